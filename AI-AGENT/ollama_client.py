@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 import requests
@@ -9,6 +9,7 @@ import requests
 @dataclass
 class OllamaClient:
     base_url: str = "http://localhost:11434"
+    session: requests.Session = field(default_factory=requests.Session, init=False, repr=False, compare=False)
 
     def chat(
         self,
@@ -35,7 +36,7 @@ class OllamaClient:
             "options": options,
         }
 
-        resp = requests.post(url, json=payload, timeout=timeout_s)
+        resp = self.session.post(url, json=payload, timeout=timeout_s)
         resp.raise_for_status()
 
         data = resp.json()
@@ -48,7 +49,7 @@ class OllamaClient:
     def health(self, timeout_s: int = 5) -> bool:
         url = f"{self.base_url.rstrip('/')}/api/tags"
         try:
-            resp = requests.get(url, timeout=timeout_s)
+            resp = self.session.get(url, timeout=timeout_s)
             return resp.status_code == 200
         except Exception:
             return False
@@ -5,6 +5,7 @@ import os
 import threading
 import uuid
 import time
+from collections import OrderedDict
 from pathlib import Path
 import unicodedata
 import re
@@ -81,6 +82,15 @@ def agent_ttl_minutes(cfg: dict) -> int:
         return 15
 
 
+def agent_max_sessions(cfg: dict) -> int:
+    agent = cfg.get("ai_agent", {}) if isinstance(cfg.get("ai_agent", {}), dict) else {}
+    limit = os.getenv("AI_AGENT_MAX_SESSIONS") or agent.get("max_sessions", 1024)
+    try:
+        return max(1, int(limit))
+    except Exception:
+        return 1024
+
+
 def agent_cleanup_fragments(cfg: dict) -> bool:
     agent = cfg.get("ai_agent", {}) if isinstance(cfg.get("ai_agent", {}), dict) else {}
     val = os.getenv("AI_AGENT_CLEANUP_FRAGMENTS") or agent.get("cleanup_fragments", True)
@@ -94,10 +104,19 @@ LLM = llm_config(CONFIG)
 AGENT_HOST, AGENT_PORT = agent_host_port(CONFIG)
 SYSTEM_PROMPT = agent_system_prompt(CONFIG)
 SESSION_TTL_MINUTES = agent_ttl_minutes(CONFIG)
+MAX_SESSIONS = agent_max_sessions(CONFIG)
 CLEANUP_FRAGMENTS = agent_cleanup_fragments(CONFIG)
 
+LLM_BASE_URL = LLM["base_url"].rstrip("/")
+
+# Shared across request threads so LLM calls reuse keep-alive connections.
+llm_http = requests.Session()
+if LLM["provider"] == "openai_compat" and LLM["api_key"]:
+    llm_http.headers["Authorization"] = f"Bearer {LLM['api_key']}"
+
 chat_lock = threading.Lock()
-chat_sessions: dict[str, dict[str, object]] = {}
+# Ordered from least to most recently active; guarded by chat_lock.
+chat_sessions: OrderedDict[str, dict[str, object]] = OrderedDict()
 
 
 def ensure_system_prompt(history: list[dict[str, str]]) -> list[dict[str, str]]:
@@ -110,33 +129,40 @@ def ensure_system_prompt(history: list[dict[str, str]]) -> list[dict[str, str]]:
 
 def prune_sessions(now_ts: float) -> None:
     ttl_seconds = SESSION_TTL_MINUTES * 60
-    stale = []
-    for sid, data in chat_sessions.items():
+    # sessions are kept in LRU order, so stale ones are always at the front
+    while chat_sessions:
+        data = next(iter(chat_sessions.values()))
         last_active = float(data.get("last_active", 0))
-        if now_ts - last_active > ttl_seconds:
-            stale.append(sid)
-    for sid in stale:
-        chat_sessions.pop(sid, None)
+        if now_ts - last_active <= ttl_seconds:
+            break
+        chat_sessions.popitem(last=False)
+
+
+def touch_session(session_id: str, session: dict[str, object]) -> None:
+    session["last_active"] = time.time()
+    chat_sessions[session_id] = session
+    chat_sessions.move_to_end(session_id)
+    while len(chat_sessions) > MAX_SESSIONS:
+        chat_sessions.popitem(last=False)
+
+
+class _NonCyrillicLetterTable(dict):
+    """str.translate table that drops non-Cyrillic letters, filled lazily per code point."""
+
+    def __missing__(self, code: int) -> int | None:
+        ch = chr(code)
+        # skip non-Cyrillic letters (Latin/CJK/etc.); keep digits, spaces, punctuation
+        drop = unicodedata.category(ch).startswith("L") and "CYRILLIC" not in unicodedata.name(ch, "")
+        value = None if drop else code
+        self[code] = value
+        return value
+
+
+_NON_CYRILLIC_LETTERS = _NonCyrillicLetterTable()
 
 
 def strip_non_russian(text: str) -> str:
-    cleaned_chars: list[str] = []
-    for ch in text:
-        if ch == "\n" or ch == "\r" or ch == "\t":
-            cleaned_chars.append(ch)
-            continue
-        if ch.isdigit() or ch.isspace():
-            cleaned_chars.append(ch)
-            continue
-        cat = unicodedata.category(ch)
-        if cat.startswith("L"):
-            name = unicodedata.name(ch, "")
-            if "CYRILLIC" in name:
-                cleaned_chars.append(ch)
-            # else skip non-Cyrillic letters (Latin/CJK/etc.)
-            continue
-        cleaned_chars.append(ch)
-    return "".join(cleaned_chars).strip()
+    return text.translate(_NON_CYRILLIC_LETTERS).strip()
 
 
 def fix_russian_awkwardness(text: str) -> str:
@@ -152,10 +178,14 @@ def fix_russian_awkwardness(text: str) -> str:
     return cleaned
 
 
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+CYRILLIC_WORD_RE = re.compile(r"[А-Яа-яЁё]+")
+
+
 def drop_trailing_fragment(text: str) -> str:
     if not CLEANUP_FRAGMENTS:
         return text
-    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    sentences = SENTENCE_SPLIT_RE.split(text.strip())
     if len(sentences) < 2:
         return text
     last = sentences[-1].strip()
@@ -163,58 +193,43 @@ def drop_trailing_fragment(text: str) -> str:
         return " ".join(sentences[:-1]).strip()
 
     # count words using Cyrillic letters to detect clipped fragments
-    words = re.findall(r"[А-Яа-яЁё]+", last)
+    words = CYRILLIC_WORD_RE.findall(last)
     if len(words) <= 2 and last.endswith("?"):
         # drop the short trailing fragment
         return " ".join(sentences[:-1]).strip()
     return text
 
 
-def llm_is_up(timeout_s: float = 1.5) -> bool:
-    base_url = LLM["base_url"].rstrip("/")
+def openai_compat_is_up(timeout_s: float = 1.5) -> bool:
     try:
-        if LLM["provider"] == "openai_compat":
-            headers = {}
-            if LLM["api_key"]:
-                headers["Authorization"] = f"Bearer {LLM['api_key']}"
-            resp = requests.get(f"{base_url}/v1/models", headers=headers, timeout=timeout_s)
-            if resp.status_code in (200, 401, 403):
-                return True
-            resp2 = requests.get(f"{base_url}/models", headers=headers, timeout=timeout_s)
-            return resp2.status_code in (200, 401, 403)
-
-        resp = requests.get(f"{base_url}/api/tags", timeout=timeout_s)
-        return resp.status_code == 200
+        resp = llm_http.get(f"{LLM_BASE_URL}/v1/models", timeout=timeout_s)
+        if resp.status_code in (200, 401, 403):
+            return True
+        resp2 = llm_http.get(f"{LLM_BASE_URL}/models", timeout=timeout_s)
+        return resp2.status_code in (200, 401, 403)
     except Exception:
         return False
 
 
-def ollama_model_present(model_name: str, timeout_s: float = 2.5) -> bool:
-    if LLM["provider"] != "ollama":
-        return False
-    base_url = LLM["base_url"].rstrip("/")
+def ollama_model_names(timeout_s: float = 2.5) -> set[str] | None:
     try:
-        resp = requests.get(f"{base_url}/api/tags", timeout=timeout_s)
+        resp = llm_http.get(f"{LLM_BASE_URL}/api/tags", timeout=timeout_s)
         resp.raise_for_status()
         data = resp.json() or {}
         models = data.get("models") or []
-        for m in models:
-            if isinstance(m, dict) and m.get("name") == model_name:
-                return True
-        return False
+        return {m["name"] for m in models if isinstance(m, dict) and m.get("name")}
     except Exception:
-        return False
+        return None
 
 
 def ollama_chat(messages: list[dict[str, str]]) -> str:
-    base_url = LLM["base_url"].rstrip("/")
     payload = {
         "model": LLM["model"],
         "messages": messages,
         "stream": False,
         "options": {"temperature": LLM["temperature"], "num_ctx": LLM["num_ctx"]},
     }
-    resp = requests.post(f"{base_url}/api/chat", json=payload, timeout=120)
+    resp = llm_http.post(f"{LLM_BASE_URL}/api/chat", json=payload, timeout=120)
     resp.raise_for_status()
     data = resp.json()
     msg = data.get("message") or {}
@@ -225,22 +240,17 @@ def ollama_chat(messages: list[dict[str, str]]) -> str:
 
 
 def openai_compat_chat(messages: list[dict[str, str]]) -> str:
-    base_url = LLM["base_url"].rstrip("/")
-    headers = {"Content-Type": "application/json"}
-    if LLM["api_key"]:
-        headers["Authorization"] = f"Bearer {LLM['api_key']}"
-
     payload = {
         "model": LLM["model"],
         "messages": messages,
         "temperature": LLM["temperature"],
     }
 
-    urls = [f"{base_url}/v1/chat/completions", f"{base_url}/chat/completions"]
+    urls = [f"{LLM_BASE_URL}/v1/chat/completions", f"{LLM_BASE_URL}/chat/completions"]
     last_exc: Exception | None = None
     for url in urls:
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=120)
+            resp = llm_http.post(url, json=payload, timeout=120)
             if resp.status_code == 404:
                 continue
             resp.raise_for_status()
@@ -266,15 +276,24 @@ def llm_chat(messages: list[dict[str, str]]) -> str:
 
 @app.get("/health")
 def health():
+    # same routing as llm_chat: everything except openai_compat talks to Ollama
+    if LLM["provider"] == "openai_compat":
+        llm_ok = openai_compat_is_up()
+        model_present = False
+    else:
+        # a single /api/tags round-trip answers both "is it up" and "is the model pulled"
+        model_names = ollama_model_names()
+        llm_ok = model_names is not None
+        model_present = LLM["provider"] == "ollama" and bool(model_names) and LLM["model"] in model_names
     return jsonify(
         {
             "status": "ok",
             "llm": {
                 "provider": LLM["provider"],
-                "ok": llm_is_up(),
+                "ok": llm_ok,
                 "base_url": LLM["base_url"],
                 "model": LLM["model"],
-                "model_present": ollama_model_present(LLM["model"]),
+                "model_present": model_present,
             },
         }
     )
@@ -322,8 +341,7 @@ def chat():
                     history = history[-max_msgs:]
 
         session["history"] = history
-        session["last_active"] = time.time()
-        chat_sessions[session_id] = session
+        touch_session(session_id, session)
 
     try:
         reply_text = llm_chat(history)
@@ -377,8 +395,7 @@ def chat():
                     history = history[-max_msgs:]
 
         session["history"] = history
-        session["last_active"] = time.time()
-        chat_sessions[session_id] = session
+        touch_session(session_id, session)
 
     return jsonify({"reply": reply_text, "session_id": session_id})
 
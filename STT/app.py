@@ -1,15 +1,16 @@
 from __future__ import annotations
 
+import io
 import os
-import tempfile
 import threading
 import time
 import traceback
 import webbrowser
 import wave
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 from faster_whisper import WhisperModel
+from faster_whisper.vad import get_vad_model
 
 import requests
 from werkzeug.exceptions import HTTPException
@@ -26,6 +27,8 @@ MODEL_SIZE = os.getenv("WHISPER_MODEL", "medium")
 DEVICE = os.getenv("WHISPER_DEVICE", "cuda")
 COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "float16")
 BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "1"))
+# 0 = CTranslate2 default (4 threads, or OMP_NUM_THREADS); set to the physical core count on bigger CPUs.
+CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))
 
 model = None
 model_lock = threading.Lock()
@@ -33,12 +36,14 @@ model_device = None
 
 
 # --- AI-AGENT ---
-AI_AGENT_URL = os.getenv("AI_AGENT_URL", "http://127.0.0.1:7000")
+AI_AGENT_URL = os.getenv("AI_AGENT_URL", "http://127.0.0.1:7000").rstrip("/")
+# Shared across request threads so calls to AI-AGENT reuse keep-alive connections.
+agent_http = requests.Session()
 
 
 def ai_agent_health(timeout_s: float = 1.5) -> dict:
     try:
-        resp = requests.get(f"{AI_AGENT_URL.rstrip('/')}/health", timeout=timeout_s)
+        resp = agent_http.get(f"{AI_AGENT_URL}/health", timeout=timeout_s)
         resp.raise_for_status()
         return resp.json()
     except Exception:
@@ -57,6 +62,7 @@ def get_model():
                         MODEL_SIZE,
                         device=DEVICE,
                         compute_type=COMPUTE_TYPE,
+                        cpu_threads=CPU_THREADS,
                         download_root=DEFAULT_MODEL_DIR,
                     )
                     model_device = DEVICE
@@ -69,6 +75,7 @@ def get_model():
                             MODEL_SIZE,
                             device="cpu",
                             compute_type="int8",
+                            cpu_threads=CPU_THREADS,
                             download_root=DEFAULT_MODEL_DIR,
                         )
                         model_device = "cpu"
@@ -78,6 +85,31 @@ def get_model():
     return model
 
 
+def warmup_model() -> None:
+    stt_model = get_model()
+    # Run one pass over a second of silence so CUDA context, kernels and the
+    # audio decoder are initialised before the first real request. VAD is left
+    # off here (it would strip the silence and skip the encoder), so the Silero
+    # VAD session used by /transcribe is loaded separately.
+    silence = io.BytesIO()
+    with wave.open(silence, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\x00\x00" * 16000)
+    silence.seek(0)
+    try:
+        start_time = time.perf_counter()
+        get_vad_model()
+        segments, _info = stt_model.transcribe(silence, language="ru", beam_size=BEAM_SIZE)
+        for _ in segments:
+            pass
+        elapsed = time.perf_counter() - start_time
+        print(f"Whisper warmup done in {elapsed:.2f}s", flush=True)
+    except Exception as exc:
+        print(f"Whisper warmup failed: {exc}", flush=True)
+
+
 @app.get("/")
 def index():
     return render_template("index.html")
@@ -129,40 +161,36 @@ def transcribe():
         return jsonify({"error": "empty filename"}), 400
 
     print("Transcribe request received", flush=True)
-    tmp_path = None
+    # Werkzeug already spooled the upload; decode straight from it instead of
+    # copying it into another temp file first.
+    stream = audio.stream
+    audio_bytes = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
+    duration_sec = None
     try:
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            audio.save(tmp.name)
-            tmp_path = tmp.name
-
-        audio_bytes = os.path.getsize(tmp_path)
-        duration_sec = None
-        try:
-            with wave.open(tmp_path, "rb") as wav:
-                duration_sec = wav.getnframes() / float(wav.getframerate())
-        except wave.Error:
-            pass
-
-        print(
-            f"Transcribe request: size={audio_bytes} bytes, duration={duration_sec}s",
-            flush=True,
-        )
-        start_time = time.perf_counter()
-
-        stt_model = get_model()
-        segments, _info = stt_model.transcribe(
-            tmp_path,
-            language="ru",
-            vad_filter=True,
-            beam_size=BEAM_SIZE,
-        )
-        text = "".join(segment.text for segment in segments).strip()
-        elapsed = time.perf_counter() - start_time
-        print(f"Transcribe done in {elapsed:.2f}s", flush=True)
-        return jsonify({"text": text, "device": model_device or DEVICE})
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+        with wave.open(stream, "rb") as wav:
+            duration_sec = wav.getnframes() / float(wav.getframerate())
+    except wave.Error:
+        pass
+    stream.seek(0)
+
+    print(
+        f"Transcribe request: size={audio_bytes} bytes, duration={duration_sec}s",
+        flush=True,
+    )
+    start_time = time.perf_counter()
+
+    stt_model = get_model()
+    segments, _info = stt_model.transcribe(
+        stream,
+        language="ru",
+        vad_filter=True,
+        beam_size=BEAM_SIZE,
+    )
+    text = "".join(segment.text for segment in segments).strip()
+    elapsed = time.perf_counter() - start_time
+    print(f"Transcribe done in {elapsed:.2f}s", flush=True)
+    return jsonify({"text": text, "device": model_device or DEVICE})
 
 
 @app.post("/chat")
@@ -170,17 +198,18 @@ def chat():
     """Proxy chat request to AI-AGENT service."""
     data = request.get_json(silent=True) or {}
     try:
-        resp = requests.post(
-            f"{AI_AGENT_URL.rstrip('/')}/chat",
+        resp = agent_http.post(
+            f"{AI_AGENT_URL}/chat",
             json=data,
             timeout=120,
         )
         content_type = resp.headers.get("content-type", "")
         if "application/json" in content_type:
-            payload = resp.json()
-        else:
-            payload = {"error": resp.text}
+            # AI-AGENT already answers with JSON; relay the body as-is instead of
+            # decoding and re-encoding it.
+            return Response(resp.content, status=resp.status_code, mimetype="application/json")
 
+        payload = {"error": resp.text}
         if not resp.ok:
             return jsonify(payload), resp.status_code
         return jsonify(payload)
@@ -201,5 +230,5 @@ if __name__ == "__main__":
     url = f"http://{host}:{port}"
     print(f"AI-AGENT URL: {AI_AGENT_URL}", flush=True)
     threading.Timer(1.0, lambda: webbrowser.open(url)).start()
-    threading.Thread(target=get_model, daemon=True).start()
+    threading.Thread(target=warmup_model, daemon=True).start()
     app.run(host=host, port=port, debug=False, use_reloader=False)
@@ -37,6 +37,8 @@ def env_from_config(cfg: dict) -> dict[str, str]:
         env["WHISPER_COMPUTE_TYPE"] = str(whisper["compute_type"])
     if whisper.get("beam_size") is not None:
         env["WHISPER_BEAM_SIZE"] = str(int(whisper["beam_size"]))
+    if whisper.get("cpu_threads") is not None:
+        env["WHISPER_CPU_THREADS"] = str(int(whisper["cpu_threads"]))
 
     llm = cfg.get("llm", {}) if isinstance(cfg.get("llm", {}), dict) else {}
     if llm.get("provider"):